@@ -1,5 +1,10 @@
 #!/usr/bin/env python3
-import os, sys, csv, argparse, requests
+import os, re, sys, csv, argparse, requests
+from contextlib import nullcontext
+from functools import lru_cache
+
+class JiraAPIError(RuntimeError):
+    """A Jira request returned a non-200 response."""
 
 # ---------- Env helpers ----------
 def env(name):
@@ -16,13 +21,18 @@ def jira_session():
     return s, base
 
 # ---------- Utilities ----------
+# JQL words that must be quoted when used as values
+_RESERVED = frozenset({"in", "was", "during", "and", "or", "not"})
+_WS_RE = re.compile(r"\s")
+
 def csv_list(s):
     # split on commas but allow quoted items; keep simple for typical input
     return [i.strip() for i in s.split(",") if i.strip()]
 
+@lru_cache(maxsize=1024)  # pure function of a small string
 def quote_if_needed(value):
     # Quote if contains spaces or special chars
-    if any(ch.isspace() for ch in value) or value.lower() in {"in","was","during","and","or","not"}:
+    if _WS_RE.search(value) or value.lower() in _RESERVED:
         return f'"{value}"'
     return value
 
@@ -38,8 +48,14 @@ def wrap_users_for_jql(users, use_accountid=False):
 def wrap_projects_for_jql(projects):
     return ", ".join(projects)
 
+def jql_string(value):
+    # Double-quoted JQL literal with backslashes and quotes escaped
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
 def wrap_statuses_for_jql(statuses):
-    return ", ".join([quote_if_needed(s) for s in statuses])
+    # Always quote (Jira accepts quoted names); escaping keeps names with quotes valid
+    return ", ".join(jql_string(s) for s in statuses)
 
 # ---------- JQL builders ----------
 def build_activity_jql(projects, date_from, date_to, inprog_statuses,
@@ -85,8 +101,7 @@ def search_issues(session, base, jql, fields=None, batch=200):
 
         r = session.post(url, json=body)
         if r.status_code != 200:
-            print(f"ERROR {r.status_code} from enhanced search: {r.text}", file=sys.stderr)
-            sys.exit(2)
+            raise JiraAPIError(f"{r.status_code}: {r.text[:500]}")
 
         data = r.json()
         for issue in data.get("issues", []):
@@ -98,6 +113,13 @@ def search_issues(session, base, jql, fields=None, batch=200):
         if not next_token:
             break
 
+# CSV column order; rows are tuples in exactly this order
+HEADER = (
+    "key", "summary", "project", "type", "status",
+    "assignee_display", "assignee_accountId",
+    "created", "updated", "resolved",
+)
+
 # ---------- Main ----------
 def main():
     ap = argparse.ArgumentParser(
@@ -144,39 +166,54 @@ def main():
     session, base = jira_session()
 
     fields = ["key", "summary", "assignee", "status", "issuetype", "project", "updated", "created", "resolutiondate"]
-    rows = []
-    for it in search_issues(session, base, jql, fields=fields, batch=300):
-        f = it.get("fields", {})
-        assignee = f.get("assignee") or {}
-        project = f.get("project") or {}
-        rows.append({
-            "key": it["key"],
-            "summary": f.get("summary", ""),
-            "project": project.get("key", ""),
-            "type": (f.get("issuetype") or {}).get("name", ""),
-            "status": (f.get("status") or {}).get("name", ""),
-            "assignee_display": assignee.get("displayName") or "",
-            "assignee_accountId": assignee.get("accountId") or "",
-            "created": f.get("created", ""),
-            "updated": f.get("updated", ""),
-            "resolved": f.get("resolutiondate", "") or "",
-        })
 
     print(f"\nJQL:\n{jql}\n")
-    print(f"Total issues: {len(rows)}\n")
-    for r in rows:
-        print(f"{r['key']} — {r['summary']}  "
-              f"[{r['project']} / {r['type']}]  "
-              f"Status: {r['status']}  "
-              f"Assignee: {r['assignee_display']}  "
-              f"Updated: {r['updated']}")
-
-    if args.csv and rows:
-        with open(args.csv, "w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-            w.writeheader()
-            w.writerows(rows)
+
+    # Rows are printed and written as they arrive instead of being held in memory,
+    # so a failed search page still leaves the earlier pages in the CSV
+    total = 0
+    failed = False
+    with (open(args.csv, "w", newline="", encoding="utf-8") if args.csv else nullcontext()) as out:
+        w = None
+        if out:
+            w = csv.writer(out)
+            w.writerow(HEADER)
+
+        try:
+            for it in search_issues(session, base, jql, fields=fields, batch=300):
+                f = it.get("fields", {})
+                assignee = f.get("assignee") or {}
+                project = f.get("project") or {}
+                r = (
+                    it["key"],
+                    f.get("summary", ""),
+                    project.get("key", ""),
+                    (f.get("issuetype") or {}).get("name", ""),
+                    (f.get("status") or {}).get("name", ""),
+                    assignee.get("displayName") or "",
+                    assignee.get("accountId") or "",
+                    f.get("created", ""),
+                    f.get("updated", ""),
+                    f.get("resolutiondate", "") or "",
+                )
+                # Positions follow HEADER
+                print(f"{r[0]} — {r[1]}  "
+                      f"[{r[2]} / {r[3]}]  "
+                      f"Status: {r[4]}  "
+                      f"Assignee: {r[5]}  "
+                      f"Updated: {r[8]}")
+                if w:
+                    w.writerow(r)
+                total += 1
+        except JiraAPIError as e:
+            print(f"ERROR from enhanced search: {e}", file=sys.stderr)
+            failed = True
+
+    print(f"\nTotal issues: {total}" + (" (incomplete, search failed)" if failed else ""))
+    if args.csv:
         print(f"\nCSV written: {args.csv}")
+    if failed:
+        sys.exit(2)
 
 if __name__ == "__main__":
     # Requires env vars:
@@ -1,6 +1,47 @@
 #!/usr/bin/env python3
-import os, sys, csv, argparse, requests
+import os, re, sys, csv, json, time, bisect, argparse, asyncio, importlib.util, requests
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util import Retry
+
+try:
+    import httpx  # optional, only needed for --async / --http2
+except ImportError:
+    httpx = None
+
+try:
+    import orjson  # optional, faster JSON decoding
+except ImportError:
+    orjson = None
+
+try:
+    import ijson  # optional, incremental parsing of search pages
+except ImportError:
+    ijson = None
+
+# Malformed bodies (e.g. an HTML proxy page): json/orjson raise ValueError subclasses
+DECODE_ERRORS = (ValueError, ijson.JSONError) if ijson else (ValueError,)
+
+# Concurrent changelog fetches; the session pool leaves headroom above it.
+# Over HTTP/2 (--http2) streams are cheap, so more workers share one connection.
+CHANGELOG_WORKERS = 16
+HTTP2_CHANGELOG_WORKERS = 32
+HTTP_POOL_SIZE = 32
+# httpx defaults to 5s, too short for a 300-issue search page with expand=changelog
+HTTP_TIMEOUT = 60.0
+
+# Transient failures retried with exponential backoff (sync and async paths)
+RETRY_TOTAL = 5
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class JiraAPIError(RuntimeError):
+    """A Jira request failed (non-200 response or transport error)."""
 
 # ---------- Env helpers ----------
 def env(name):
@@ -13,18 +54,102 @@ def jira_session():
     s = requests.Session()
     s.auth = (env("JIRA_EMAIL"), env("JIRA_API_TOKEN"))
     s.headers.update({"Accept": "application/json"})
+    # Retry rate limits / transient 5xx with exponential backoff (honours Retry-After)
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=list(RETRY_STATUSES),
+        allowed_methods=["GET", "POST"],
+        respect_retry_after_header=True,
+        raise_on_status=False,  # hand back the last response so check_response reports it
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
     base = env("JIRA_BASE_URL").rstrip("/")
     return s, base
 
+def require_httpx(flag):
+    # http2=True also needs the h2 package, which plain `pip install httpx` lacks
+    if httpx is None or importlib.util.find_spec("h2") is None:
+        print(f"ERROR: {flag} requires httpx with HTTP/2 support (pip install 'httpx[http2]')", file=sys.stderr); sys.exit(1)
+
+def jira_http2_client():
+    # A single connection on purpose: every changelog GET becomes an HTTP/2
+    # stream on it. No pool timeout, in case the server only speaks HTTP/1.1.
+    require_httpx("--http2")
+    return httpx.Client(
+        http2=True,
+        auth=(env("JIRA_EMAIL"), env("JIRA_API_TOKEN")),
+        headers={"Accept": "application/json"},
+        limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, pool=None),
+    )
+
+def jira_async_client():
+    require_httpx("--async")
+    base = env("JIRA_BASE_URL").rstrip("/")
+    return httpx.AsyncClient(
+        http2=True,
+        auth=(env("JIRA_EMAIL"), env("JIRA_API_TOKEN")),
+        base_url=base,
+        headers={"Accept": "application/json"},
+        limits=httpx.Limits(max_connections=HTTP_POOL_SIZE, max_keepalive_connections=HTTP_POOL_SIZE),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, pool=None),
+    )
+
+def retry_delay(r, attempt):
+    retry_after = r.headers.get("Retry-After", "")
+    return float(retry_after) if retry_after.isdigit() else RETRY_BACKOFF * (2 ** attempt)
+
+def request_with_retry(client, method, url, **kwargs):
+    # httpx has no status-based retry; mirror the session's Retry policy.
+    # A requests session retries in its adapter and hands back the final
+    # response (raise_on_status=False), so it must not loop again here.
+    if isinstance(client, requests.Session):
+        return client.request(method, url, **kwargs)
+    for attempt in range(RETRY_TOTAL + 1):
+        r = client.request(method, url, **kwargs)
+        if r.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+            return r
+        time.sleep(retry_delay(r, attempt))
+
+async def request_with_retry_async(client, method, url, **kwargs):
+    # Transport errors (timeouts, resets) are retried too, like urllib3's Retry
+    for attempt in range(RETRY_TOTAL + 1):
+        try:
+            r = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            if attempt == RETRY_TOTAL:
+                raise
+            await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+            continue
+        if r.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+            return r
+        await asyncio.sleep(retry_delay(r, attempt))
+
 # ---------- Utilities ----------
+def check_response(r):
+    if r.status_code != 200:
+        raise JiraAPIError(f"{r.status_code}: {r.text[:500]}")
+
+def response_json(r):
+    # orjson parses the raw bytes directly (requests and httpx responses alike)
+    return orjson.loads(r.content) if orjson else r.json()
+
+# JQL words that must be quoted when used as values
+_RESERVED = frozenset({"in", "was", "during", "and", "or", "not"})
+_WS_RE = re.compile(r"\s")
+
 def csv_list(s):
     return [i.strip() for i in s.split(",") if i.strip()]
 
+@lru_cache(maxsize=1024)  # pure function of a small string
 def quote_if_needed(value):
     if not value:
         return '""'
     # Quote if contains spaces or reserved words
-    if any(ch.isspace() for ch in value) or value.lower() in {"in","was","during","and","or","not"}:
+    if _WS_RE.search(value) or value.lower() in _RESERVED:
         return f'"{value}"'
     return value
 
@@ -37,11 +162,29 @@ def wrap_users_for_jql(users, use_accountid=False):
 def wrap_projects_for_jql(projects):
     return ", ".join(projects)
 
+def jql_string(value):
+    # Double-quoted JQL literal with backslashes and quotes escaped
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
 def wrap_statuses_for_jql(statuses):
-    return ", ".join([quote_if_needed(s) for s in statuses])
+    # Always quote (Jira accepts quoted names); escaping keeps names with quotes valid
+    return ", ".join(jql_string(s) for s in statuses)
+
+@lru_cache(maxsize=None)
+def utc_offset_tz(offset):
+    # "+0200" -> timezone(timedelta(hours=2))
+    sign = -1 if offset[0] == "-" else 1
+    return timezone(sign * timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5])))
 
 def parse_api_dt(s):
-    # Jira dates like "2025-07-15T09:12:34.123+0000"
+    # Jira dates like "2025-07-15T09:12:34.123+0000"; slicing the fixed-width
+    # format is much faster than strptime, which stays as the fallback
+    if len(s) == 28 and s[19] == ".":
+        dt = datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                      int(s[11:13]), int(s[14:16]), int(s[17:19]), int(s[20:23]) * 1000,
+                      utc_offset_tz(s[23:]))
+        return dt.astimezone(timezone.utc)
     return datetime.strptime(s, "%Y-%m-%dT%H:%M:%S.%f%z").astimezone(timezone.utc)
 
 def parse_date_ymd_utc(s, end_of_day=False):
@@ -50,9 +193,6 @@ def parse_date_ymd_utc(s, end_of_day=False):
         return dt.replace(hour=23, minute=59, second=59, microsecond=999000)
     return dt
 
-def overlaps(a_start, a_end, b_start, b_end):
-    return (a_start <= b_end) and (b_start <= a_end)
-
 # ---------- JQL builders ----------
 def build_activity_jql(projects, date_from, date_to, inprog_statuses,
                        users=None, use_accountid=False, extra=None):
@@ -62,52 +202,156 @@ def build_activity_jql(projects, date_from, date_to, inprog_statuses,
       (status WAS IN in-progress DURING window)
     Optional: assignee WAS IN users DURING window
     """
-    project_clause = f"project in ({wrap_projects_for_jql(projects)})"
     window = f'("{date_from}", "{date_to}")'
-
-    status_changed = f"status CHANGED DURING {window}"
-    in_progress_was = f"status WAS IN ({wrap_statuses_for_jql(inprog_statuses)}) DURING {window}"
-
-    activity_clause = f"({status_changed} OR {in_progress_was})"
-
-    clauses = [project_clause, activity_clause]
-
+    proj_str = wrap_projects_for_jql(projects)
+    status_str = wrap_statuses_for_jql(inprog_statuses)
+    users_str = ""
     if users:
-        users_expr = wrap_users_for_jql(users, use_accountid=use_accountid)
-        clauses.append(f"assignee WAS IN ({users_expr}) DURING {window}")
-
-    if extra:
-        clauses.append(f"({extra})")
+        users_str = f" AND assignee WAS IN ({wrap_users_for_jql(users, use_accountid=use_accountid)}) DURING {window}"
+    extra_str = f" AND ({extra})" if extra else ""
 
-    return " AND ".join(clauses) + " ORDER BY updated DESC"
+    return (f"project in ({proj_str}) AND "
+            f"(status CHANGED DURING {window} OR status WAS IN ({status_str}) DURING {window})"
+            f"{users_str}{extra_str} ORDER BY updated DESC")
 
 # ---------- Enhanced search (new API) ----------
-def search_issues(session, base, jql, fields=None, batch=200):
-    url = f"{base}/rest/api/3/search/jql"
+SEARCH_PATH = "/rest/api/3/search/jql"
+
+def search_body(jql, fields, batch, expand, next_token):
+    body = {"jql": jql, "maxResults": min(batch, 1000), "fieldsByKeys": False}
+    if fields:
+        body["fields"] = fields
+    if expand:
+        # Enhanced search takes expand as a comma-separated string
+        body["expand"] = ",".join(expand)
+    if next_token:
+        body["nextPageToken"] = next_token
+    return body
+
+def next_page_token(data):
+    if data.get("isLast", False):
+        return None
+    return data.get("nextPageToken")
+
+def stream_search_page(raw, page):
+    """
+    Yield issues from a search response body while it is still arriving,
+    recording the top-level isLast / nextPageToken into page in the same pass.
+    """
+    builder = None
+    for prefix, event, value in ijson.parse(raw, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == "issues.item" and event == "end_map":
+                yield builder.value
+                builder = None
+        elif prefix == "issues.item" and event == "start_map":
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif prefix in ("isLast", "nextPageToken"):
+            page[prefix] = value
+
+def search_issues(session, base, jql, fields=None, batch=200, expand=None):
+    url = f"{base}{SEARCH_PATH}"
     next_token = None
     while True:
-        body = {"jql": jql, "maxResults": min(batch, 1000)}
-        if fields:
-            body["fields"] = fields
-        if next_token:
-            body["nextPageToken"] = next_token
-
-        r = session.post(url, json=body)
-        if r.status_code != 200:
-            print(f"ERROR {r.status_code} from enhanced search: {r.text}", file=sys.stderr)
-            sys.exit(2)
-
-        data = r.json()
+        body = search_body(jql, fields, batch, expand, next_token)
+        try:
+            with session.post(url, json=body, stream=ijson is not None) as r:
+                check_response(r)
+
+                if ijson is not None:
+                    data = {}
+                    r.raw.decode_content = True  # let urllib3 undo gzip
+                    yield from stream_search_page(r.raw, data)
+                else:
+                    data = response_json(r)
+                    yield from data.get("issues", [])
+        except (requests.RequestException, Urllib3HTTPError) as e:
+            raise JiraAPIError(f"enhanced search failed: {e}") from e
+        except DECODE_ERRORS as e:
+            raise JiraAPIError(f"enhanced search returned invalid JSON: {e}") from e
+
+        next_token = next_page_token(data)
+        if not next_token:
+            break
+
+async def search_issues_async(client, jql, fields=None, batch=200, expand=None):
+    next_token = None
+    while True:
+        try:
+            r = await request_with_retry_async(client, "POST", SEARCH_PATH,
+                                               json=search_body(jql, fields, batch, expand, next_token))
+        except httpx.HTTPError as e:
+            # str() of e.g. httpx.ReadTimeout is empty, so name the type
+            raise JiraAPIError(f"enhanced search failed: {type(e).__name__}: {e}") from e
+        check_response(r)
+
+        try:
+            data = response_json(r)
+        except DECODE_ERRORS as e:
+            raise JiraAPIError(f"enhanced search returned invalid JSON: {e}") from e
         for issue in data.get("issues", []):
             yield issue
 
-        if data.get("isLast", False):
-            break
-        next_token = data.get("nextPageToken")
+        next_token = next_page_token(data)
         if not next_token:
             break
 
-# ---------- Changelog paging (assignee history) ----------
+# ---------- Changelog (assignee history) ----------
+def assignee_changes_from_histories(histories):
+    changes = []
+    for h in histories:
+        created = h.get("created")
+        if not created:
+            continue
+        created_dt = parse_api_dt(created)
+        for item in h.get("items", []):
+            if item.get("field") == "assignee":
+                changes.append({
+                    "created_dt": created_dt,
+                    "from_id": item.get("from"),
+                    "from_name": item.get("fromString"),
+                    "to_id": item.get("to"),
+                    "to_name": item.get("toString"),
+                })
+    return changes
+
+def needs_changelog_fetch(issue):
+    """
+    True when the search did not return the issue's full changelog inline
+    (missing, or more histories than the embedded page holds).
+    """
+    changelog = issue.get("changelog")
+    if not changelog:
+        return True
+    total = changelog.get("total") or 0
+    max_results = changelog.get("maxResults")
+    return max_results is not None and total > max_results
+
+def extract_assignee_changes(issue):
+    """
+    Same as get_assignee_changes, but read from the changelog embedded
+    by search_issues(..., expand=["changelog"]) without any HTTP call.
+    """
+    histories = (issue.get("changelog") or {}).get("histories") or []
+    changes = assignee_changes_from_histories(histories)
+    changes.sort(key=lambda x: x["created_dt"])
+    return changes
+
+CHANGELOG_PAGE_SIZE = 100
+
+def next_changelog_start(data, start_at):
+    """
+    startAt for the next changelog page, or None when done.
+    """
+    total = data.get("total")
+    if total is None:
+        # Cloud format returns isLast + nextPage parameters sometimes
+        return start_at + CHANGELOG_PAGE_SIZE if not data.get("isLast", True) else None
+    start_at += CHANGELOG_PAGE_SIZE
+    return start_at if start_at < total else None
+
 def get_assignee_changes(session, base, issue_key):
     """
     Returns a list of assignee change entries sorted by created asc.
@@ -121,43 +365,87 @@ def get_assignee_changes(session, base, issue_key):
     """
     url = f"{base}/rest/api/3/issue/{issue_key}/changelog"
     start_at = 0
-    max_results = 100
     changes = []
-    while True:
-        r = session.get(url, params={"startAt": start_at, "maxResults": max_results})
-        if r.status_code != 200:
-            print(f"ERROR {r.status_code} fetching changelog for {issue_key}: {r.text}", file=sys.stderr)
-            break
-        data = r.json()
-        histories = data.get("values") or data.get("histories") or []
-        for h in histories:
-            created = h.get("created")
-            if not created:
-                continue
-            created_dt = parse_api_dt(created)
-            for item in h.get("items", []):
-                if item.get("field") == "assignee":
-                    changes.append({
-                        "created_dt": created_dt,
-                        "from_id": item.get("from"),
-                        "from_name": item.get("fromString"),
-                        "to_id": item.get("to"),
-                        "to_name": item.get("toString"),
-                    })
-        total = data.get("total")
-        if total is None:
-            # Cloud format returns isLast + nextPage parameters sometimes
-            if not data.get("isLast", True):
-                start_at += max_results
-                continue
-            break
-        start_at += max_results
-        if start_at >= total:
-            break
+    while start_at is not None:
+        r = request_with_retry(session, "GET", url, params={"startAt": start_at, "maxResults": CHANGELOG_PAGE_SIZE})
+        check_response(r)
+        data = response_json(r)
+        changes.extend(assignee_changes_from_histories(data.get("values") or data.get("histories") or []))
+        start_at = next_changelog_start(data, start_at)
+
+    changes.sort(key=lambda x: x["created_dt"])
+    return changes
+
+async def get_assignee_changes_async(client, issue_key, semaphore):
+    """
+    Async twin of get_assignee_changes; semaphore caps in-flight requests.
+    """
+    url = f"/rest/api/3/issue/{issue_key}/changelog"
+    start_at = 0
+    changes = []
+    while start_at is not None:
+        try:
+            async with semaphore:
+                r = await request_with_retry_async(client, "GET", url,
+                                                   params={"startAt": start_at, "maxResults": CHANGELOG_PAGE_SIZE})
+        except httpx.HTTPError as e:
+            raise JiraAPIError(f"changelog fetch failed: {type(e).__name__}: {e}") from e
+        check_response(r)
+        data = response_json(r)
+        changes.extend(assignee_changes_from_histories(data.get("values") or data.get("histories") or []))
+        start_at = next_changelog_start(data, start_at)
 
     changes.sort(key=lambda x: x["created_dt"])
     return changes
 
+# ---------- Changelog cache (across runs) ----------
+def load_changelog_cache(path):
+    """
+    Cache file maps issue key -> {"updated": <issue updated>, "changes": [...]}.
+    An unchanged 'updated' timestamp means an unchanged changelog.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"WARNING: ignoring unreadable cache {path}: {e}", file=sys.stderr)
+        return {}
+
+def save_changelog_cache(path, cache):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp, path)
+
+def cached_assignee_changes(cache, issue):
+    entry = cache.get(issue["key"])
+    updated = (issue.get("fields") or {}).get("updated")
+    if not entry or not updated or entry.get("updated") != updated:
+        return None
+    return [dict(c, created_dt=datetime.fromisoformat(c["created_dt"])) for c in entry["changes"]]
+
+def store_assignee_changes(cache, issue, changes):
+    updated = (issue.get("fields") or {}).get("updated")
+    if not updated:
+        return
+    cache[issue["key"]] = {
+        "updated": updated,
+        "changes": [dict(c, created_dt=c["created_dt"].isoformat()) for c in changes],
+    }
+
+def local_assignee_changes(issue, cache=None):
+    """
+    Assignee changes available without a changelog request (inline from the
+    search, or from the cache), else None.
+    """
+    if not needs_changelog_fetch(issue):
+        return extract_assignee_changes(issue)
+    if cache is not None:
+        return cached_assignee_changes(cache, issue)
+    return None
+
 def compute_assignee_window_info(issue_fields, assignee_changes, window_start, window_end):
     """
     Build assignment intervals from changes and find who held the assignee field
@@ -207,29 +495,32 @@ def compute_assignee_window_info(issue_fields, assignee_changes, window_start, w
             "name": cur.get("displayName"),
         })
 
-    # Find overlaps with the window
+    # Find overlaps with the window. Intervals are contiguous and sorted, so
+    # starts and ends are both non-decreasing: [lo, hi) is exactly the
+    # intervals with end >= window_start and start <= window_end.
+    starts = [iv["start"] for iv in intervals]
+    ends = [iv["end"] for iv in intervals]
+    lo = bisect.bisect_left(ends, window_start)
+    hi = bisect.bisect_right(starts, window_end)
     holders = []
-    for iv in intervals:
-        if overlaps(iv["start"], iv["end"], window_start, window_end):
-            # compute actual overlap range inside window for ordering
-            overlap_start = max(iv["start"], window_start)
-            overlap_end = min(iv["end"], window_end)
-            holders.append({
-                "id": iv["id"],
-                "name": iv["name"],
-                "overlap_start": overlap_start,
-                "overlap_end": overlap_end,
-            })
+    for iv in intervals[lo:hi]:
+        # compute actual overlap range inside window for ordering
+        overlap_start = max(iv["start"], window_start)
+        overlap_end = min(iv["end"], window_end)
+        holders.append({
+            "id": iv["id"],
+            "name": iv["name"],
+            "overlap_start": overlap_start,
+            "overlap_end": overlap_end,
+        })
 
-    # Unique by id/name keeping order by first overlap_start
-    seen = set()
-    holders_sorted = sorted(holders, key=lambda h: (h["overlap_start"], h["overlap_end"]))
-    unique = []
-    for h in holders_sorted:
-        key = (h["id"], h["name"])
-        if key not in seen:
-            seen.add(key)
-            unique.append(h)
+    # Unique by id/name keeping order by first overlap_start. Holders are
+    # already in interval order (= overlap order), so no sort is needed;
+    # setdefault keeps each holder's first overlap.
+    first_seen = {}
+    for h in holders:
+        first_seen.setdefault((h["id"], h["name"]), h)
+    unique = list(first_seen.values())
 
     assignees_display = ", ".join([h["name"] for h in unique if h["name"]])
     assignees_ids = ", ".join([h["id"] for h in unique if h["id"]])
@@ -245,14 +536,18 @@ def compute_assignee_window_info(issue_fields, assignee_changes, window_start, w
         "holders": unique,  # keep for matching step
     }
 
-def match_holders_to_user_filter(holders, users, use_accountid):
-    if not users:
+def normalize_users(users):
+    # Computed once per run; match_holders_to_user_filter does set lookups
+    return frozenset(u.strip().lower() for u in users)
+
+def match_holders_to_user_filter(holders, users_norm, use_accountid):
+    if not users_norm:
         return ""
     out = []
-    users_norm = [u.strip().lower() for u in users]
     for h in holders:
         if use_accountid:
-            if h["id"] and h["id"].lower() in users_norm:
+            hid = (h["id"] or "").lower()
+            if hid and hid in users_norm:
                 out.append(h["name"] or h["id"])
         else:
             nm = (h["name"] or "").lower()
@@ -265,6 +560,171 @@ def match_holders_to_user_filter(holders, users, use_accountid):
             seen.add(x); out_unique.append(x)
     return ", ".join(out_unique)
 
+# CSV column order; build_row returns tuples in exactly this order
+HEADER = (
+    "key", "summary", "project", "type", "status",
+    "assignee_display", "assignee_accountId",
+    "assignees_during_window_display", "assignees_during_window_accountIds",
+    "matched_assignees_during_window", "first_assignee_in_window", "last_assignee_in_window",
+    "created", "updated", "resolved",
+)
+
+def build_row(it, changes, window_start, window_end, users_norm, use_accountid):
+    f = it.get("fields", {})
+    assignee = f.get("assignee") or {}
+    project = f.get("project") or {}
+
+    # Compute who held assignee during the window from the changelog
+    win = compute_assignee_window_info(f, changes, window_start, window_end)
+    matched_names = match_holders_to_user_filter(win["holders"], users_norm, use_accountid) if users_norm else ""
+
+    return (
+        it["key"],
+        f.get("summary", ""),
+        project.get("key", ""),
+        (f.get("issuetype") or {}).get("name", ""),
+        (f.get("status") or {}).get("name", ""),
+        assignee.get("displayName") or "",           # current assignee (for reference)
+        assignee.get("accountId") or "",
+        win["assignees_during_window_display"],
+        win["assignees_during_window_accountIds"],
+        matched_names,
+        win["first_assignee_in_window"],
+        win["last_assignee_in_window"],
+        f.get("created", ""),
+        f.get("updated", ""),
+        f.get("resolutiondate", "") or "",
+    )
+
+# ---------- Fetch pipeline ----------
+# Issues held back waiting on changelog fetches so rows keep search order
+ROW_BUFFER = 4 * CHANGELOG_WORKERS
+# Most recent changelog fetches kept for repeated keys; bounded so memory stays flat
+DEDUPE_KEYS = 1024
+
+def recent_fetch(inflight, key):
+    fetch = inflight.get(key)
+    if fetch is not None:
+        inflight.move_to_end(key)
+    return fetch
+
+def remember_fetch(inflight, key, fetch):
+    # Evicting a still-pending fetch is harmless: its row entry holds it too
+    inflight[key] = fetch
+    if len(inflight) > DEDUPE_KEYS:
+        inflight.popitem(last=False)
+    return fetch
+
+def iter_rows(session, base, jql, fields, window_start, window_end, users_norm, use_accountid, cache=None,
+              changelog_client=None, skip_changelog=False, failures=None):
+    """
+    Yield rows in search order (updated DESC) as the search pages stream in.
+    Changelogs come back inline with the search; only issues whose history
+    overflows the embedded page (and isn't cached) are fetched on the thread
+    pool, with at most ROW_BUFFER issues pending at a time. changelog_client
+    (e.g. jira_http2_client()) replaces the session for those fetches.
+    An issue whose changelog fetch fails is still yielded, with the current
+    assignee standing in for the window assignees, and its key is appended
+    to failures; a failed search page raises JiraAPIError after the rows
+    already received have been yielded.
+    With skip_changelog no history is requested at all and the current
+    assignee stands in for the window assignees.
+    """
+    def finish(it, changes, fut):
+        if fut is not None:
+            try:
+                changes = fut.result()
+            except Exception as e:
+                print(f"ERROR fetching changelog for {it['key']}: {e}", file=sys.stderr)
+                if failures is not None:
+                    failures.append(it["key"])
+                changes = []  # not cached, so the next run retries it
+            else:
+                if cache is not None:
+                    store_assignee_changes(cache, it, changes)
+        return build_row(it, changes, window_start, window_end, users_norm, use_accountid)
+
+    client = changelog_client or session
+    workers = HTTP2_CHANGELOG_WORKERS if changelog_client else CHANGELOG_WORKERS
+    expand = None if skip_changelog else ["changelog"]
+    pending = deque()
+    inflight = OrderedDict()  # issue key -> changelog fetch (LRU, DEDUPE_KEYS entries)
+    error = None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for it in search_issues(session, base, jql, fields=fields, batch=300, expand=expand):
+                changes = [] if skip_changelog else local_assignee_changes(it, cache)
+                it.pop("changelog", None)  # only the assignee changes are kept past this point
+                fut = None
+                if changes is None:
+                    # A key repeated across pages shares the first fetch
+                    fut = recent_fetch(inflight, it["key"])
+                    if fut is None:
+                        fut = remember_fetch(inflight, it["key"],
+                                             executor.submit(get_assignee_changes, client, base, it["key"]))
+                pending.append((it, changes, fut))
+                # Emit from the head while it's ready, or block once the buffer is full
+                while pending and (pending[0][2] is None or pending[0][2].done() or len(pending) > ROW_BUFFER):
+                    yield finish(*pending.popleft())
+        except JiraAPIError as e:
+            error = e
+        # Flush issues already received, including after a failed search page
+        while pending:
+            yield finish(*pending.popleft())
+    if error is not None:
+        raise error
+
+async def iter_rows_async(jql, fields, window_start, window_end, users_norm, use_accountid, cache=None,
+                          skip_changelog=False, failures=None):
+    """
+    Async twin of iter_rows: changelog fetches run as tasks on the event loop,
+    capped at HTTP_POOL_SIZE in-flight requests.
+    """
+    async def finish(it, changes, task):
+        if task is not None:
+            try:
+                changes = await task
+            except Exception as e:
+                print(f"ERROR fetching changelog for {it['key']}: {e}", file=sys.stderr)
+                if failures is not None:
+                    failures.append(it["key"])
+                changes = []  # not cached, so the next run retries it
+            else:
+                if cache is not None:
+                    store_assignee_changes(cache, it, changes)
+        return build_row(it, changes, window_start, window_end, users_norm, use_accountid)
+
+    client = jira_async_client()
+    semaphore = asyncio.Semaphore(HTTP_POOL_SIZE)
+    expand = None if skip_changelog else ["changelog"]
+    pending = deque()
+    inflight = OrderedDict()  # issue key -> changelog fetch (LRU, DEDUPE_KEYS entries)
+    error = None
+    async with client:
+        try:
+            async for it in search_issues_async(client, jql, fields=fields, batch=300, expand=expand):
+                changes = [] if skip_changelog else local_assignee_changes(it, cache)
+                it.pop("changelog", None)
+                task = None
+                if changes is None:
+                    task = recent_fetch(inflight, it["key"])
+                    if task is None:
+                        task = remember_fetch(inflight, it["key"], asyncio.create_task(
+                            get_assignee_changes_async(client, it["key"], semaphore)))
+                pending.append((it, changes, task))
+                while pending and (pending[0][2] is None or pending[0][2].done() or len(pending) > ROW_BUFFER):
+                    yield await finish(*pending.popleft())
+        except JiraAPIError as e:
+            error = e
+        while pending:
+            yield await finish(*pending.popleft())
+    if error is not None:
+        raise error
+
+async def drain_async(rows, emit):
+    async for row in rows:
+        emit(row)
+
 # ---------- Main ----------
 def main():
     ap = argparse.ArgumentParser(
@@ -279,6 +739,15 @@ def main():
     ap.add_argument("--use-accountid", action="store_true", help="Treat --users as accountIds")
     ap.add_argument("--extra-jql", help="Optional extra JQL, e.g. 'issuetype in (Bug,Story)'")
     ap.add_argument("--csv", default="", help="If set, write results to CSV file")
+    transport = ap.add_mutually_exclusive_group()  # --async is already HTTP/2 throughout
+    transport.add_argument("--async", dest="use_async", action="store_true",
+                    help="Use httpx.AsyncClient (HTTP/2) instead of requests + threads")
+    transport.add_argument("--http2", action="store_true",
+                    help="Fetch changelogs with httpx over one multiplexed HTTP/2 connection")
+    ap.add_argument("--skip-changelog", action="store_true",
+                    help="Don't fetch assignee history; window-assignee columns then equal the current assignee")
+    ap.add_argument("--cache", default="",
+                    help="Optional: JSON file caching fetched changelogs by issue key + updated, reused across runs")
 
     args = ap.parse_args()
 
@@ -289,6 +758,7 @@ def main():
     if not inprog_statuses:
         print("ERROR: --in-progress-statuses cannot be empty", file=sys.stderr); sys.exit(1)
     users = csv_list(args.users) if args.users else None
+    users_norm = normalize_users(users) if users else None
 
     jql = build_activity_jql(
         projects=projects,
@@ -300,57 +770,67 @@ def main():
         extra=args.extra_jql,
     )
 
-    session, base = jira_session()
     window_start = parse_date_ymd_utc(args.date_from, end_of_day=False)
     window_end = parse_date_ymd_utc(args.date_to, end_of_day=True)
 
     fields = ["key", "summary", "assignee", "status", "issuetype", "project", "updated", "created", "resolutiondate"]
-    rows = []
-
-    for it in search_issues(session, base, jql, fields=fields, batch=300):
-        f = it.get("fields", {})
-        assignee = f.get("assignee") or {}
-        project = f.get("project") or {}
-
-        # Pull assignee changelog and compute who held assignee during the window
-        changes = get_assignee_changes(session, base, it["key"])
-        win = compute_assignee_window_info(f, changes, window_start, window_end)
-        matched_names = match_holders_to_user_filter(win["holders"], users, args.use_accountid) if users else ""
-
-        row = {
-            "key": it["key"],
-            "summary": f.get("summary", ""),
-            "project": project.get("key", ""),
-            "type": (f.get("issuetype") or {}).get("name", ""),
-            "status": (f.get("status") or {}).get("name", ""),
-            "assignee_display": assignee.get("displayName") or "",           # current assignee (for reference)
-            "assignee_accountId": assignee.get("accountId") or "",
-            "assignees_during_window_display": win["assignees_during_window_display"],
-            "assignees_during_window_accountIds": win["assignees_during_window_accountIds"],
-            "matched_assignees_during_window": matched_names,
-            "first_assignee_in_window": win["first_assignee_in_window"],
-            "last_assignee_in_window": win["last_assignee_in_window"],
-            "created": f.get("created", ""),
-            "updated": f.get("updated", ""),
-            "resolved": f.get("resolutiondate", "") or "",
-        }
-        rows.append(row)
+    cache = load_changelog_cache(args.cache) if args.cache else None
 
     print(f"\nJQL:\n{jql}\n")
-    print(f"Total issues: {len(rows)}\n")
-    for r in rows:
-        print(f"{r['key']} — {r['summary']}  "
-              f"[{r['project']} / {r['type']}]  "
-              f"Status: {r['status']}  "
-              f"Assignee (current): {r['assignee_display']}  "
-              f"Assignee(s) in window: {r['assignees_during_window_display']}")
-
-    if args.csv and rows:
-        with open(args.csv, "w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-            w.writeheader()
-            w.writerows(rows)
+
+    # Rows are printed and written as they arrive instead of being held in memory,
+    # so a failed search still leaves everything fetched so far in the CSV
+    total = 0
+    failed = False
+    changelog_failures = []
+    with (open(args.csv, "w", newline="", encoding="utf-8") if args.csv else nullcontext()) as out:
+        w = None
+        if out:
+            w = csv.writer(out)
+            w.writerow(HEADER)
+
+        def emit(r):
+            nonlocal total
+            # Positions follow HEADER
+            print(f"{r[0]} — {r[1]}  "
+                  f"[{r[2]} / {r[3]}]  "
+                  f"Status: {r[4]}  "
+                  f"Assignee (current): {r[5]}  "
+                  f"Assignee(s) in window: {r[7]}")
+            if w:
+                w.writerow(r)
+            total += 1
+
+        try:
+            if args.use_async:
+                asyncio.run(drain_async(
+                    iter_rows_async(jql, fields, window_start, window_end, users_norm, args.use_accountid, cache=cache,
+                                    skip_changelog=args.skip_changelog, failures=changelog_failures),
+                    emit))
+            else:
+                session, base = jira_session()
+                with (jira_http2_client() if args.http2 else nullcontext()) as h2:
+                    for r in iter_rows(session, base, jql, fields, window_start, window_end, users_norm,
+                                       args.use_accountid, cache=cache, changelog_client=h2,
+                                       skip_changelog=args.skip_changelog, failures=changelog_failures):
+                        emit(r)
+        except JiraAPIError as e:
+            print(f"ERROR from Jira API: {e}", file=sys.stderr)
+            failed = True
+        finally:
+            if cache is not None:
+                save_changelog_cache(args.cache, cache)
+
+    incomplete = []
+    if failed:
+        incomplete.append("search failed")
+    if changelog_failures:
+        incomplete.append(f"{len(changelog_failures)} changelog fetches failed")
+    print(f"\nTotal issues: {total}" + (f" (incomplete, {', '.join(incomplete)})" if incomplete else ""))
+    if args.csv:
         print(f"\nCSV written: {args.csv}")
+    if incomplete:
+        sys.exit(2)
 
 if __name__ == "__main__":
     # Env vars required: